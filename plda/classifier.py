@@ -164,14 +164,8 @@ class Classifier:
         """
         assert type(normalize_logps) == bool
 
-        logpps_by_category = []
         K = self.get_categories()
-
-        for k in K:
-            logpps_k = self.model.calc_logp_posterior_predictive(data, k)
-            logpps_by_category.append(logpps_k)
-
-        logpps_by_category = np.stack(logpps_by_category, axis=-1)
+        logpps_by_category = self.model.calc_logp_posterior_predictive_all(data)
 
         if normalize_logps:
             norms = logsumexp(logpps_by_category, axis=-1)
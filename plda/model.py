@@ -16,15 +16,97 @@ import logging
 from typing import Optional, Union
 import numpy as np
 from sklearn.decomposition import PCA
-from scipy.stats import multivariate_normal as gaussian
+
+try:
+    import numba
+except ImportError:  # Numba is optional; NumPy is used without it.
+    numba = None
+
 from .optimizer import (
     get_prior_params,
     get_posterior_params,
     get_posterior_predictive_params,
     optimize_maximum_likelihood,  # I.e. empirical Bayes.
+    calc_rank,
     calc_scatter_matrices,
 )
 
+LN2PI = float(np.log(2 * np.pi))  # A Python float keeps float32 math in float32.
+
+
+def calc_logp_diagonal_gaussian(data, mean, inv_cov_diag, log_det_cov):
+    """Gaussian log density with a diagonal covariance on axis=-1."""
+    diff = data - mean
+    mahalanobis = np.einsum("...d,d,...d->...", diff, inv_cov_diag, diff)
+
+    return -0.5 * (mean.shape[-1] * LN2PI + log_det_cov + mahalanobis)
+
+
+def get_array_module(device):
+    """NumPy for the "cpu" device and CuPy for the "cuda" device."""
+    if device == "cuda":
+        import cupy  # CuPy is optional; it is only needed for GPU scoring.
+
+        return cupy
+
+    return np
+
+
+def apply_on_unique_rows(func, data):
+    """Evaluates `func` once per distinct vector on axis=-1 of `data`.
+
+    DESCRIPTION
+     `func` must map an array of shape=(n, dim) to one of shape=(n, ...).
+     Results are scattered back to every duplicate,
+      so the output has shape=(*data.shape[:-1], ...).
+    """
+    rows = data.reshape(-1, data.shape[-1])
+    unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+
+    result = func(unique_rows)[inverse.reshape(-1)]
+
+    return result.reshape(*data.shape[:-1], *result.shape[1:])
+
+
+def calc_sufficient_statistics(U_model):
+    """Number, sum and sum of squares of the vectors on axis=-2."""
+    n = U_model.shape[-2]
+    sum_U = np.add.reduce(U_model, axis=-2)
+    sumsq_U = np.einsum("...nd,...nd->...d", U_model, U_model)
+
+    return n, sum_U, sumsq_U
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True)
+    def _ml_kernel(U_model, psi_diag):
+        """Log marginal likelihoods of shape=(n_batch,) for U_model of
+        shape=(n_batch, n, U_model_dimensionality), reading U_model once.
+        """
+        n_batch, n, dim = U_model.shape
+        logp_ml = np.empty(n_batch)
+
+        for b in numba.prange(n_batch):
+            sum_U = np.zeros(dim)
+            sumsq_U = np.zeros(dim)
+            for i in range(n):
+                for d in range(dim):
+                    u = U_model[b, i, d]
+                    sum_U[d] += u
+                    sumsq_U[d] += u * u
+
+            total = 0.0
+            for d in range(dim):
+                n_psi_plus_eye = n * psi_diag[d] + 1
+                total += -0.5 * n * LN2PI - 0.5 * np.log(n_psi_plus_eye)
+                total += -0.5 * sumsq_U[d]
+                total += 0.5 * psi_diag[d] * sum_U[d] ** 2 / n_psi_plus_eye
+
+            logp_ml[b] = total
+
+        return logp_ml
+
 
 def get_space_walk(from_space, to_space):
     U_model_to_D = ["U_model", "U", "X", "D"]
@@ -47,6 +129,11 @@ def get_space_walk(from_space, to_space):
     from_spaces = [x for x in spaces[from_idx:to_idx]]
     to_spaces = [x for x in spaces[from_idx + 1 : to_idx + 1]]
 
+    if from_spaces[:2] == ["U_model", "U"]:
+        # U_model maps straight to X without being zero-padded into U.
+        from_spaces = ["U_model"] + from_spaces[2:]
+        to_spaces = to_spaces[1:]
+
     return zip(from_spaces, to_spaces)
 
 
@@ -54,8 +141,16 @@ def transform_D_to_X(data, pca):
     return data if pca is None else pca.transform(data)
 
 
-def transform_X_to_U(data, inv_A, m):
-    return np.matmul(data - m, inv_A.T)
+def transform_D_to_U(data, D_mean, DtoU_W, DtoU_b):
+    """Same as D -> X -> U, applied as a single centered affine map."""
+    U = np.matmul(data - D_mean, DtoU_W)
+    U += DtoU_b
+
+    return U
+
+
+def transform_X_to_U(data, inv_A_T, m):
+    return np.matmul(data - m, inv_A_T)
 
 
 def transform_U_to_U_model(data, relevant_U_dims):
@@ -71,14 +166,74 @@ def transform_U_model_to_U(data, relevant_U_dims, U_dimensionality):
     return U
 
 
-def transform_U_to_X(data, A, m):
-    return m + np.matmul(data, A.T)
+def transform_U_model_to_X(data, A_relevant_T, m):
+    """Same as U_model -> U -> X, skipping the zero columns of U."""
+    X = np.matmul(data, A_relevant_T)
+    X += m
+
+    return X
+
+
+def transform_U_to_X(data, A_T, m):
+    X = np.matmul(data, A_T)
+    X += m
+
+    return X
 
 
 def transform_X_to_D(data, pca):
     return data if pca is None else pca.inverse_transform(data)
 
 
+SPACES = ["D", "X", "U", "U_model"]
+
+# Each walk is resolved once at import instead of on every transform() call.
+SPACE_WALKS = {
+    (from_space, to_space): tuple(get_space_walk(from_space, to_space))
+    for from_space in SPACES
+    for to_space in SPACES
+}
+
+# D maps to U (and U_model) through one precomputed affine map.
+SPACE_WALKS[("D", "U")] = (("D", "U"),)
+SPACE_WALKS[("D", "U_model")] = (("D", "U_model"),)
+
+BASIC_TRANSFORMS = {
+    ("D", "X"): lambda model, data: transform_D_to_X(data, model.pca),
+    ("D", "U"): lambda model, data: transform_D_to_U(
+        data, model._D_mean, model._DtoU_W, model._DtoU_b
+    ),
+    ("D", "U_model"): lambda model, data: transform_D_to_U(
+        data, model._D_mean, model._score_W, model._score_b
+    ),
+    ("X", "U"): lambda model, data: transform_X_to_U(data, model._inv_A_T, model.m),
+    ("U", "U_model"): lambda model, data: transform_U_to_U_model(
+        data, model.relevant_U_dims
+    ),
+    ("U_model", "U"): lambda model, data: transform_U_model_to_U(
+        data, model.relevant_U_dims, model._u_dim
+    ),
+    ("U_model", "X"): lambda model, data: transform_U_model_to_X(
+        data, model._A_relevant_T, model.m
+    ),
+    ("U", "X"): lambda model, data: transform_U_to_X(data, model._A_T, model.m),
+    ("X", "D"): lambda model, data: transform_X_to_D(data, model.pca),
+}
+
+# Caps the differences held at once by calc_logp_posterior_predictive_all().
+MAX_DIFF_ELEMENTS = 2 ** 22
+
+# What score() and calc_logp_posterior_predictive_all() read, see Model.to().
+SCORING_PARAMS = (
+    "_D_mean",
+    "_score_W",
+    "_score_b",
+    "_pp_inv",
+    "_pp_inv_means",
+    "_pp_const",
+)
+
+
 class Model:
     def __init__(self):
 
@@ -88,45 +243,208 @@ class Model:
         self.Psi = None
         self.relevant_U_dims = None
         self.inv_A = None
+        self.dtype = np.dtype(np.float64)
+        self.device = "cpu"
+
+        # Dimensionalities of U and U_model, cached for the hot paths.
+        self._u_dim = None
+        self._u_model_dim = None
+
+        # C-contiguous transposes of A and inv_A for the transforms.
+        self._A_T = None
+        self._inv_A_T = None
+        self._A_relevant_T = None
+
+        # Affine maps from D straight to U and, for score(), to U_model.
+        self._D_mean = None
+        self._DtoU_W = None
+        self._DtoU_b = None
+        self._score_W = None
+        self._score_b = None
 
         self.prior_params = None
         self.posterior_params = None
         self.posterior_predictive_params = None
 
-    def calc_logp_posterior(self, v_model, category):
-        assert v_model.shape[-1] == self.get_dimensionality("U_model")
+        # Inverse covariances and log determinants, cached by fit().
+        self._prior_inv = None
+        self._prior_logdet = None
+        self._post_inv = None
+        self._post_logdet = None
+        self._postpred_inv = None
+        self._postpred_logdet = None
+
+        # Posterior predictive parameters stacked along the category axis.
+        self._pp_means = None
+        self._pp_inv = None
+        self._pp_logdet = None
+
+        # Expanded Mahalanobis terms for the GPU: inv * mean and a constant.
+        self._pp_inv_means = None
+        self._pp_const = None
+
+        # Copies of SCORING_PARAMS on a GPU, set by to("cuda").
+        self._device_params = None
+
+    def calc_logp_posterior(self, v_model, category, unique=False):
+        """Set `unique=True` to evaluate duplicate vectors only once."""
+        assert v_model.shape[-1] == self._u_model_dim
+
+        if unique:
+            return apply_on_unique_rows(
+                lambda rows: self.calc_logp_posterior(rows, category), v_model
+            )
 
         mean = self.posterior_params[category]["mean"]
-        cov_diag = self.posterior_params[category]["cov_diag"]
+        inv_cov_diag = self._post_inv[category]
+        log_det_cov = self._post_logdet[category]
+
+        return calc_logp_diagonal_gaussian(v_model, mean, inv_cov_diag, log_det_cov)
 
-        return gaussian(mean, np.diag(cov_diag)).logpdf(v_model)
+    def calc_logp_posterior_predictive(self, U_model, category, unique=False):
+        """Set `unique=True` to evaluate duplicate vectors only once."""
+        assert U_model.shape[-1] == self._u_model_dim
 
-    def calc_logp_posterior_predictive(self, U_model, category):
-        assert U_model.shape[-1] == self.get_dimensionality("U_model")
+        if unique:
+            return apply_on_unique_rows(
+                lambda rows: self.calc_logp_posterior_predictive(rows, category),
+                U_model,
+            )
 
         mean = self.posterior_predictive_params[category]["mean"]
-        cov_diag = self.posterior_predictive_params[category]["cov_diag"]
+        inv_cov_diag = self._postpred_inv[category]
+        log_det_cov = self._postpred_logdet[category]
+
+        return calc_logp_diagonal_gaussian(U_model, mean, inv_cov_diag, log_det_cov)
+
+    def calc_logp_posterior_predictive_all(self, U_model, unique=False):
+        """Posterior predictive log densities for all categories at once.
+
+        PARAMETERS
+         unique  (bool)
+           - Whether to evaluate duplicate vectors in `U_model` only once.
+           - Only pays off when the vectors are heavily duplicated.
+
+        RETURNS
+         logpps  (numpy.ndarray), shape=(*U_model.shape[:-1], n_categories)
+           - Categories are ordered as in `posterior_predictive_params`.
+        """
+        assert U_model.shape[-1] == self._u_model_dim
+
+        if unique:
+            return apply_on_unique_rows(
+                self.calc_logp_posterior_predictive_all, U_model
+            )
+
+        if self._device_params is not None:
+            xp = get_array_module(self.device)
+            params = self._device_params
+            U_model = xp.asarray(U_model)
+
+            # (u - mean)^T inv (u - mean), expanded into two gemms over
+            # categories. Faster on a GPU, but the expanded terms cancel,
+            # so the CPU path below is more precise for float32 models.
+            mahalanobis = xp.matmul(U_model * U_model, params["_pp_inv"].T)
+            mahalanobis -= 2 * xp.matmul(U_model, params["_pp_inv_means"].T)
+
+            return xp.asnumpy(-0.5 * (mahalanobis + params["_pp_const"]))
+
+        n_categories, D = self._pp_means.shape
+        n_vectors = max(1, U_model.size // D)
+        block_size = max(1, MAX_DIFF_ELEMENTS // (n_vectors * D))
+
+        dtype = np.result_type(U_model, self._pp_means)
+        logpps = np.empty((*U_model.shape[:-1], n_categories), dtype=dtype)
+
+        # Blocks of categories bound the memory used by the differences.
+        for start in range(0, n_categories, block_size):
+            block = slice(start, start + block_size)
+            diff = U_model[..., None, :] - self._pp_means[block]
+            logpps[..., block] = np.einsum(
+                "...kd,kd,...kd->...k", diff, self._pp_inv[block], diff
+            )
 
-        return gaussian(mean, np.diag(cov_diag)).logpdf(U_model)
+        logpps += D * LN2PI + self._pp_logdet
+        logpps *= -0.5
+
+        return logpps
+
+    def score(self, data):
+        """Posterior predictive log densities of data space vectors.
+
+        DESCRIPTION
+         Same as `calc_logp_posterior_predictive_all()` applied to
+          `transform(data, "D", "U_model")`, but the D -> X -> U -> U_model
+          chain is applied as a single precomputed affine map.
+
+        RETURNS
+         logpps  (numpy.ndarray), shape=(*data.shape[:-1], n_categories)
+        """
+        xp = get_array_module(self.device)
+        params = self.__dict__ if self._device_params is None else self._device_params
+
+        U_model = xp.matmul(xp.asarray(data) - params["_D_mean"], params["_score_W"])
+        U_model += params["_score_b"]
+
+        return self.calc_logp_posterior_predictive_all(U_model)
+
+    def to(self, device):
+        """Moves the parameters used by `score()` and
+        `calc_logp_posterior_predictive_all()` to "cpu" or "cuda".
+
+        DESCRIPTION
+         "cuda" requires CuPy, which is not installed with plda:
+          install the build matching your CUDA toolkit separately.
+          Inputs are copied to the device, and results are always
+          returned as NumPy arrays. The GPU expands the Mahalanobis
+          distance into matrix products, which is less precise for
+          float32 models with well-separated categories.
+        """
+        if device == "cpu":
+            self._device_params = None
+
+        elif device == "cuda":
+            xp = get_array_module(device)
+            self._device_params = {
+                name: xp.asarray(getattr(self, name)) for name in SCORING_PARAMS
+            }
+
+        else:
+            raise ValueError(f"Unknown {device=}, expected 'cpu' or 'cuda'")
+
+        self.device = device
+
+        return self
 
     def calc_logp_marginal_likelihood(self, U_model):
         """Computes the log marginal likelihood on axis=-2."""
-        assert U_model.shape[-1] == self.get_dimensionality("U_model")
+        assert U_model.shape[-1] == self._u_model_dim
 
         if len(U_model.shape) == 1:
             U_model = U_model[None, :]
 
-        n = U_model.shape[-2]
+        if numba is not None:
+            batch_shape = U_model.shape[:-2]
+            U_model = np.ascontiguousarray(U_model).reshape(-1, *U_model.shape[-2:])
+            logp_ml = _ml_kernel(U_model, self.prior_params["cov_diag"])
+
+            return logp_ml.reshape(batch_shape)[()]
+
+        n, sum_U, sumsq_U = calc_sufficient_statistics(U_model)
+
+        return self._marginal_ll_from_suffstats(n, sum_U, sumsq_U)
+
+    def _marginal_ll_from_suffstats(self, n, sum_U, sumsq_U):
+        """Log marginal likelihood of `n` vectors from their sum (of squares)."""
         psi_diag = self.prior_params["cov_diag"]
         n_psi_plus_eye = n * psi_diag + 1
 
         log_constant = -0.5 * n * np.log(2 * np.pi)
         log_constant += -0.5 * np.log(n_psi_plus_eye)
 
-        sum_of_squares = np.sum(U_model**2, axis=-2)
-        log_exponent_1 = -0.5 * sum_of_squares
+        log_exponent_1 = -0.5 * sumsq_U
 
-        mean = U_model.mean(axis=-2)
+        mean = sum_U / n
         log_exponent_2 = 0.5 * (n**2 * psi_diag * mean**2)
         log_exponent_2 /= n_psi_plus_eye
 
@@ -135,54 +453,93 @@ class Model:
 
         return logp_ml
 
-    def calc_logp_prior(self, v_model):
-        assert v_model.shape[-1] == self.get_dimensionality("U_model")
+    def calc_logp_prior(self, v_model, unique=False):
+        """Set `unique=True` to evaluate duplicate vectors only once."""
+        assert v_model.shape[-1] == self._u_model_dim
+
+        if unique:
+            return apply_on_unique_rows(self.calc_logp_prior, v_model)
 
         mean = self.prior_params["mean"]
-        cov_diag = self.prior_params["cov_diag"]
 
-        return gaussian(mean, np.diag(cov_diag)).logpdf(v_model)
+        return calc_logp_diagonal_gaussian(
+            v_model, mean, self._prior_inv, self._prior_logdet
+        )
 
     def calc_same_diff_log_likelihood_ratio(self, U_model_p, U_model_g):
-        assert U_model_p.shape[-1] == self.get_dimensionality("U_model")
-        assert U_model_g.shape[-1] == self.get_dimensionality("U_model")
-
-        U_model_same = np.concatenate(
-            [
-                U_model_p,
-                U_model_g,
-            ]
-        )
-        ll_same = self.calc_logp_marginal_likelihood(U_model_same)
-        ll_p = self.calc_logp_marginal_likelihood(U_model_p)
-        ll_g = self.calc_logp_marginal_likelihood(U_model_g)
+        """Log likelihood ratio of "same category" vs "different categories".
+
+        ARGUMENTS
+         U_model_p, U_model_g  (numpy.ndarray or dict)
+           - Vectors in U_model space, shape=(..., n, U_model_dimensionality),
+              or an enrollment returned by the `enroll()` method.
+           - Enrolling a gallery once avoids recomputing its statistics
+              every time it is scored against a new probe.
+        """
+        n_p, s_p, ss_p = self._get_suffstats(U_model_p)
+        n_g, s_g, ss_g = self._get_suffstats(U_model_g)
+
+        # The statistics of the pooled set are sums of the two sets' statistics.
+        ll_same = self._marginal_ll_from_suffstats(n_p + n_g, s_p + s_g, ss_p + ss_g)
+        ll_p = self._marginal_ll_from_suffstats(n_p, s_p, ss_p)
+        ll_g = self._marginal_ll_from_suffstats(n_g, s_g, ss_g)
         ll_same = ll_same - (ll_p + ll_g)
 
         return ll_same
 
+    def enroll(self, U_model):
+        """Sufficient statistics of `U_model` on axis=-2, for repeated scoring."""
+        n, sum_U, sumsq_U = self._get_suffstats(U_model)
+
+        return {"n": n, "sum": sum_U, "sum_of_squares": sumsq_U}
+
+    def _get_suffstats(self, U_model):
+        if isinstance(U_model, dict):
+            return U_model["n"], U_model["sum"], U_model["sum_of_squares"]
+
+        assert U_model.shape[-1] == self._u_model_dim
+
+        if len(U_model.shape) == 1:
+            U_model = U_model[None, :]
+
+        return calc_sufficient_statistics(U_model)
+
     def fit(
         self,
         data,
         labels,
         feat_dim: Optional[int] = None,
         pca: Optional[Union[PCA, str]] = None,
+        dtype=np.float64,
     ):
+        """Fits the model; `dtype` sets the precision of the data and of
+        the cached scoring parameters, e.g. np.float32 halves their memory.
+        """
         assert len(data.shape) == 2
         assert len(labels) == data.shape[0]
 
+        self.dtype = np.dtype(dtype)
+        data = np.asarray(data, dtype=self.dtype)
+
         data_dim = data.shape[-1]
 
         if pca is None:
             logging.info("Estimating new PCA vector base")
             S_b, S_w = calc_scatter_matrices(data, labels)
-            matrix_rank = np.linalg.matrix_rank(S_w)
+            matrix_rank = calc_rank(S_w)
             if feat_dim != matrix_rank:
                 logging.warning(
                     f"The feat_dim estimated from data is {matrix_rank} "
                     f"but you provide {feat_dim=} which will be used"
                 )
                 matrix_rank = feat_dim
-            self.pca = PCA(n_components=matrix_rank)
+            if data_dim >= 256 and matrix_rank is not None and matrix_rank < data_dim:
+                # Truncated randomized SVD avoids a full SVD of wide data.
+                self.pca = PCA(
+                    n_components=matrix_rank, svd_solver="randomized", random_state=0
+                )
+            else:
+                self.pca = PCA(n_components=matrix_rank)
         elif pca == "skip":
             self.pca = None
         else:
@@ -212,8 +569,12 @@ class Model:
             logging.warning(
                 f"Skipping PCA projection and decorelation. The data dimension wil be {data_dim}"
             )
+            X = data
         else:
-            self.pca.fit(data)
+            # Not fit_transform(): with a randomized SVD (requested, or picked by
+            # svd_solver="auto") it returns U * S from the approximate
+            # factorization, which differs from the transform() used at scoring.
+            X = self.pca.fit(data).transform(data)
             if self.pca.n_components_ == data_dim:
                 logging.info(f"PCA keeps the {data_dim=} but decoralates the features")
             else:
@@ -221,8 +582,6 @@ class Model:
                     f"PCA reduces {data_dim=} to {self.pca.n_components_} and decoralates the features"
                 )
 
-        X = self.transform(data, from_space="D", to_space="X")
-
         (
             self.m,
             self.A,
@@ -231,6 +590,8 @@ class Model:
             self.inv_A,
         ) = optimize_maximum_likelihood(X, labels)
 
+        self._cache_transform_params()
+
         U_model = self.transform(X, from_space="X", to_space="U_model")
 
         self.prior_params = get_prior_params(self.Psi, self.relevant_U_dims)
@@ -241,12 +602,110 @@ class Model:
             self.posterior_params
         )
 
+        self._cache_scoring_params()
+
+    def __getstate__(self):
+        # Device copies are not pickled; loaded models score on the CPU.
+        state = self.__dict__.copy()
+        state["device"] = "cpu"
+        state["_device_params"] = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("dtype", np.dtype(np.float64))
+        self.__dict__.setdefault("device", "cpu")
+        self.__dict__.setdefault("_device_params", None)
+
+        # Models pickled before the caches existed only store fitted parameters.
+        fitted = self.posterior_predictive_params is not None
+        if fitted and getattr(self, "_u_model_dim", None) is None:
+            self._cache_transform_params()
+            self._cache_scoring_params()
+
+    def _cache_transform_params(self):
+        """Precomputes the matrices used by the transforms between spaces."""
+        self._u_dim = self.A.shape[0]
+        self._u_model_dim = self.relevant_U_dims.shape[0]
+
+        dtype = self.dtype
+        self._A_T = np.ascontiguousarray(self.A.T, dtype=dtype)
+        self._inv_A_T = np.ascontiguousarray(self.inv_A.T, dtype=dtype)
+        self._A_relevant_T = np.ascontiguousarray(
+            self.A[:, self.relevant_U_dims].T, dtype=dtype
+        )
+
+        # All transforms between D and U are affine, so compose them.
+        # The data is still centered in D space: folding that mean into the
+        # offset loses precision when the data sits far from the origin.
+        W = self.inv_A.T
+        if self.pca is None:
+            D_mean = self.m
+            b = np.zeros(W.shape[-1])
+        else:
+            W_pca = self.pca.components_.T
+            if self.pca.whiten:
+                W_pca = W_pca / np.sqrt(self.pca.explained_variance_)
+
+            D_mean = self.pca.mean_
+            b = -np.matmul(self.m, W)  # m is ~0, the PCA already centers X.
+            W = np.matmul(W_pca, W)
+
+        self._D_mean = np.asarray(D_mean, dtype=dtype)
+        self._DtoU_W = np.ascontiguousarray(W, dtype=dtype)
+        self._DtoU_b = b.astype(dtype)
+        self._score_W = np.ascontiguousarray(W[:, self.relevant_U_dims], dtype=dtype)
+        self._score_b = b[self.relevant_U_dims].astype(dtype)
+
+    def _cache_scoring_params(self):
+        """Precomputes what the diagonal Gaussian log densities need."""
+        dtype = self.dtype
+
+        prior_cov_diag = self.prior_params["cov_diag"]
+        self._prior_inv = (1.0 / prior_cov_diag).astype(dtype)
+        self._prior_logdet = float(np.log(prior_cov_diag).sum())
+
+        self._post_inv = dict()
+        self._post_logdet = dict()
+        for k, k_params in self.posterior_params.items():
+            self._post_inv[k] = (1.0 / k_params["cov_diag"]).astype(dtype)
+            self._post_logdet[k] = float(np.log(k_params["cov_diag"]).sum())
+
+        self._postpred_inv = dict()
+        self._postpred_logdet = dict()
+        for k, k_params in self.posterior_predictive_params.items():
+            self._postpred_inv[k] = (1.0 / k_params["cov_diag"]).astype(dtype)
+            self._postpred_logdet[k] = float(np.log(k_params["cov_diag"]).sum())
+
+        categories = list(self.posterior_predictive_params.keys())
+        pp_params = [self.posterior_predictive_params[k] for k in categories]
+        pp_means = np.stack([k_params["mean"] for k_params in pp_params])
+        pp_cov_diags = np.stack([k_params["cov_diag"] for k_params in pp_params])
+        pp_logdet = np.asarray([self._postpred_logdet[k] for k in categories])
+
+        self._pp_means = pp_means.astype(dtype)
+        self._pp_inv = (1.0 / pp_cov_diags).astype(dtype)
+        self._pp_logdet = pp_logdet.astype(dtype)
+
+        # Expanding the Mahalanobis distance leaves terms free of the data.
+        # Only the GPU path uses them; see calc_logp_posterior_predictive_all.
+        pp_inv_means = pp_means / pp_cov_diags
+        pp_const = pp_means.shape[-1] * LN2PI + pp_logdet
+        pp_const += np.sum(pp_inv_means * pp_means, axis=-1)
+
+        self._pp_inv_means = pp_inv_means.astype(dtype)
+        self._pp_const = pp_const.astype(dtype)
+
+        if self.device != "cpu":
+            self.to(self.device)  # Refresh the device copies after a refit.
+
     def get_dimensionality(self, space):
         if space == "U_model":
-            return self.relevant_U_dims.shape[0]
+            return self._u_model_dim
 
         elif space == "U":
-            return self.A.shape[0]
+            return self._u_dim
 
         elif space == "X":
             return self.A.shape[0]
@@ -290,34 +749,17 @@ class Model:
 
          6. From X to D.
              (i.e. from the preprocessed space to the data space)
+
+         Walks starting in U_model go to X directly,
+          using only the columns of A that correspond to the model's
+          dimensions rather than padding U_model with zeros first.
+         Walks from D to U or U_model apply 1. and 2. (and 3.)
+          as a single precomputed affine map.
         """
         if len(data.shape) == 1:
             data = data[None, :]
 
-        if from_space == "D" and to_space == "X":
-            return transform_D_to_X(data, self.pca)
-
-        elif from_space == "X" and to_space == "U":
-            return transform_X_to_U(data, self.inv_A, self.m)
-
-        elif from_space == "U" and to_space == "U_model":
-            return transform_U_to_U_model(data, self.relevant_U_dims)
-
-        elif from_space == "U_model" and to_space == "U":
-            dim = self.get_dimensionality("U")
-
-            return transform_U_model_to_U(data, self.relevant_U_dims, dim)
-
-        elif from_space == "U" and to_space == "X":
-            return transform_U_to_X(data, self.A, self.m)
-
-        elif from_space == "X" and to_space == "D":
-            return transform_X_to_D(data, self.pca)
-
-        else:
-            transformed = data
-
-            for space_1, space_2 in get_space_walk(from_space, to_space):
-                transformed = self.transform(transformed, space_1, space_2)
+        for space_1, space_2 in SPACE_WALKS[(from_space, to_space)]:
+            data = BASIC_TRANSFORMS[(space_1, space_2)](self, data)
 
-            return transformed
+        return data
@@ -72,7 +72,7 @@ def optimize_maximum_likelihood(X, labels):
     n_avg = calc_n_avg(labels)
 
     A = calc_A(n_avg, Lambda_w, W)
-    inv_A = np.linalg.inv(A)
+    inv_A = calc_inv_A(n_avg, Lambda_w, W)
 
     Psi = calc_Psi(Lambda_w, Lambda_b, n_avg)
     relevant_U_dims = get_relevant_U_dims(Psi)
@@ -104,6 +104,19 @@ def calc_A(n_avg, Lambda_w, W):
     return inv_W_T * (n_avg / (n_avg - 1) * Lambda_w_diagonal) ** 0.5
 
 
+def calc_inv_A(n_avg, Lambda_w, W):
+    """Inverse of `calc_A()`, in closed form from W instead of inverting A.
+
+    DESCRIPTION
+     A = inv(W.T) @ diag(scale), so inv(A) = diag(1 / scale) @ W.T.
+    """
+    Lambda_w_diagonal = Lambda_w.diagonal()  # Should be diagonal matrix.
+
+    scale = (n_avg / (n_avg - 1) * Lambda_w_diagonal) ** 0.5
+
+    return W.T / scale[:, None]
+
+
 def calc_Lambda_b(S_b, W):
     """See Fig. 2 on p.537 of Ioffe 2006."""
     return np.matmul(np.matmul(W.T, S_b), W)
@@ -140,6 +153,20 @@ def calc_Psi(Lambda_w, Lambda_b, n_avg):
     return np.diag(Psi)
 
 
+def calc_rank(S):
+    """Rank of a symmetric positive semi-definite matrix such as S_w.
+
+    DESCRIPTION
+     Same tolerance as np.linalg.matrix_rank(),
+      but uses the cheaper symmetric eigensolver instead of an SVD,
+      since the singular values of S are its absolute eigenvalues.
+    """
+    eigenvalues = np.abs(np.linalg.eigvalsh(S))
+    tolerance = eigenvalues.max() * max(S.shape) * np.finfo(eigenvalues.dtype).eps
+
+    return int((eigenvalues > tolerance).sum())
+
+
 def calc_scatter_matrices(X, Y):
     """See Equations (1) on p.532 of Ioffe 2006."""
     assert len(X.shape) == 2
@@ -183,24 +210,24 @@ def calc_W(S_b, S_w):
 
 
 def get_posterior_params(U_model, Y, prior_params):
-    labels = np.asarray(Y)
-    prior_cov_diagonal = prior_params["cov_diag"]
+    """Per-category posterior parameters of the latent category means.
 
-    cov_diags = []
-    means = []
-    categories = []
+    DESCRIPTION
+     Counts and sums for all categories come from one sort of U_model
+      and a segmented reduction, instead of one pass per category.
+    """
+    prior_cov_diagonal = prior_params["cov_diag"]
 
-    for k in np.unique(labels):
-        bool_idxs = labels == k
-        U_model_k = U_model[bool_idxs]
-        n_k = bool_idxs.sum()
+    categories, label_ids, n_ks = np.unique(
+        np.asarray(Y), return_inverse=True, return_counts=True
+    )
 
-        cov_diag = prior_cov_diagonal / (1 + n_k * prior_cov_diagonal)
-        mean = U_model_k.sum(axis=0) * cov_diag
+    order = np.argsort(label_ids.reshape(-1), kind="stable")
+    starts = np.cumsum(n_ks) - n_ks
+    sums = np.add.reduceat(U_model[order], starts, axis=0)
 
-        cov_diags.append(cov_diag)
-        means.append(mean)
-        categories.append(k)
+    cov_diags = prior_cov_diagonal / (1 + n_ks[:, None] * prior_cov_diagonal)
+    means = sums * cov_diags
 
     return as_dictionary_of_dictionaries(categories, means, cov_diags)
 
@@ -125,7 +125,7 @@ def test_transform(data_dict, model):
     X = data_dict['data']
 
     expected = transform_D_to_X(X, model.pca)
-    expected = transform_X_to_U(expected, model.inv_A, model.m)
+    expected = transform_X_to_U(expected, model.inv_A.T, model.m)
     expected = transform_U_to_U_model(expected, model.relevant_U_dims)
 
     actual = model.transform(X, from_space='D', to_space='U_model')
@@ -135,7 +135,7 @@ def test_transform(data_dict, model):
     # U_model to D.
     dim = model.get_dimensionality('U')
     expected = transform_U_model_to_U(actual, model.relevant_U_dims, dim)
-    expected = transform_U_to_X(expected, model.A, model.m)
+    expected = transform_U_to_X(expected, model.A.T, model.m)
     expected = transform_X_to_D(expected, model.pca)
 
     actual = model.transform(actual, from_space='U_model', to_space='D')
@@ -148,7 +148,7 @@ def test_transform(data_dict, model):
 
     tmp_model = plda.Model(data, data_dict['labels'])
     expected = transform_D_to_X(data, tmp_model.pca)
-    expected = transform_X_to_U(expected, tmp_model.inv_A, tmp_model.m)
+    expected = transform_X_to_U(expected, tmp_model.inv_A.T, tmp_model.m)
     expected = transform_U_to_U_model(expected, tmp_model.relevant_U_dims)
 
     actual = tmp_model.transform(data, from_space='D', to_space='U_model')
@@ -157,7 +157,7 @@ def test_transform(data_dict, model):
     # U_model to D.
     dim = tmp_model.get_dimensionality('U')
     expected = transform_U_model_to_U(actual, tmp_model.relevant_U_dims, dim)
-    expected = transform_U_to_X(expected, tmp_model.A, tmp_model.m)
+    expected = transform_U_to_X(expected, tmp_model.A.T, tmp_model.m)
     expected = transform_X_to_D(expected, tmp_model.pca)
 
     actual = model.transform(actual, from_space='U_model', to_space='D')
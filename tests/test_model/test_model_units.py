@@ -13,37 +13,328 @@
 # limitations under the License.
 # ==============================================================================
 import numpy as np
+import pickle
 import pytest
 
 from numpy.testing import assert_allclose
 from plda import plda
+from plda.plda.optimizer import get_posterior_params
+from plda.tests.utils import generate_data
 from plda.plda.model import (
+    apply_on_unique_rows,
+    calc_logp_diagonal_gaussian,
+    calc_sufficient_statistics,
     get_space_walk,
     transform_D_to_X,
     transform_X_to_U,
     transform_U_to_U_model,
     transform_U_model_to_U,
+    transform_U_model_to_X,
     transform_U_to_X,
     transform_X_to_D
 )
+from scipy.stats import multivariate_normal as gaussian
 from sklearn.decomposition import PCA
 
 
+@pytest.fixture(scope='module')
+def fitted_model():
+    np.random.seed(1234)
+
+    truth_dict = generate_data(100, 5, 10)
+
+    model = plda.Model()
+    model.fit(truth_dict['data'], truth_dict['labels'])
+
+    return model, truth_dict
+
+
 def gen_invertible_matrix(dim, scale):
     arr = np.random.random((dim, dim)) * scale
 
     return np.matmul(arr, arr.T)
 
 
+def test_calc_logp_diagonal_gaussian():
+    np.random.seed(1234)
+
+    n = 100
+    dim = 5
+    data = np.random.random((n, dim))
+    mean = np.random.random(dim)
+    cov_diag = np.random.random(dim) + .5
+
+    expected = gaussian(mean, np.diag(cov_diag)).logpdf(data)
+    actual = calc_logp_diagonal_gaussian(data, mean, 1 / cov_diag,
+                                         np.log(cov_diag).sum())
+
+    assert_allclose(actual, expected)
+
+
+def test_calc_logp_posterior_predictive_all(fitted_model):
+    model, truth_dict = fitted_model
+    U_model = model.transform(truth_dict['data'], 'D', 'U_model')
+
+    expected = [model.calc_logp_posterior_predictive(U_model, k)
+                for k in model.posterior_predictive_params.keys()]
+    expected = np.stack(expected, axis=-1)
+    actual = model.calc_logp_posterior_predictive_all(U_model)
+
+    assert_allclose(actual, expected)
+
+
+def test_score(fitted_model):
+    model, truth_dict = fitted_model
+    data = truth_dict['data']
+
+    X = model.transform(data, 'D', 'X')
+    U_model = model.transform(X, 'X', 'U_model')
+    expected = model.calc_logp_posterior_predictive_all(U_model)
+    actual = model.score(data)
+
+    assert_allclose(actual, expected)
+
+
+def test_calc_logp_marginal_likelihood(fitted_model):
+    model, truth_dict = fitted_model
+    U_model = model.transform(truth_dict['data'], 'D', 'U_model')
+    U_model = U_model.reshape(10, 50, -1)
+
+    n, sum_U, sumsq_U = calc_sufficient_statistics(U_model)
+    expected = model._marginal_ll_from_suffstats(n, sum_U, sumsq_U)
+    actual = model.calc_logp_marginal_likelihood(U_model)
+
+    assert actual.shape == (10,)
+    assert_allclose(actual, expected)
+
+
+def test_to(fitted_model):
+    model, truth_dict = fitted_model
+    data = truth_dict['data']
+    expected = model.score(data)
+
+    with pytest.raises(ValueError):
+        model.to('tpu')
+
+    assert model.to('cpu') is model
+    assert_allclose(model.score(data), expected)
+
+    pytest.importorskip('cupy')
+    try:
+        actual = model.to('cuda').score(data)
+    finally:
+        model.to('cpu')
+
+    assert isinstance(actual, np.ndarray)
+    assert_allclose(actual, expected)
+
+
+def test_fit_wide_data_with_truncated_pca():
+    np.random.seed(1234)
+
+    K = 20
+    n_k = 30
+    data_dim = 300
+    feat_dim = 100
+
+    # Nearly isotropic data, so the truncated randomized SVD is inexact.
+    means = np.random.normal(scale=.5, size=(K, data_dim))
+    data = np.repeat(means, n_k, axis=0)
+    data += np.random.normal(size=data.shape)
+    labels = np.repeat(np.arange(K), n_k)
+
+    model = plda.Model()
+    model.fit(data, labels, feat_dim=feat_dim)
+    assert model.pca.svd_solver == 'randomized'
+
+    # The parameters must be fitted on the projection used at scoring time.
+    X = model.transform(data, 'D', 'X')
+    assert_allclose(model.m, X.mean(axis=0), atol=1e-10)
+
+    U_model = model.transform(X, 'X', 'U_model')
+    expected = get_posterior_params(U_model, labels, model.prior_params)
+    for k, k_params in expected.items():
+        assert_allclose(model.posterior_params[k]['mean'], k_params['mean'])
+
+
+def test_fit_float32(fitted_model):
+    model, truth_dict = fitted_model
+    data = truth_dict['data']
+
+    model_32 = plda.Model()
+    model_32.fit(data, truth_dict['labels'], dtype=np.float32)
+
+    expected = model.score(data)
+    actual = model_32.score(data.astype(np.float32))
+
+    assert actual.dtype == np.float32
+    assert_allclose(actual, expected, rtol=1e-4)
+
+
+def test_calc_logp_posterior_predictive_all_float32_separated(monkeypatch):
+    np.random.seed(1234)
+
+    K = 50
+    n_k = 20
+    dim = 10
+
+    # Means far apart relative to the spread, as in speaker identification.
+    means = np.random.normal(scale=100, size=(K, dim))
+    data = np.repeat(means, n_k, axis=0)
+    data += np.random.normal(size=data.shape)
+    labels = np.repeat(np.arange(K), n_k)
+
+    model = plda.Model()
+    model.fit(data, labels, dtype=np.float32)
+
+    U_model = model.transform(data.astype(np.float32), 'D', 'U_model')
+    expected = np.stack([
+        model.calc_logp_posterior_predictive(U_model, k)
+        for k in model.posterior_predictive_params.keys()
+    ], axis=-1)
+
+    actual = model.calc_logp_posterior_predictive_all(U_model)
+
+    assert actual.dtype == np.float32
+    assert_allclose(actual, expected, rtol=1e-5)
+
+    # One category per block must give the same densities.
+    monkeypatch.setattr(plda.model, 'MAX_DIFF_ELEMENTS', 1)
+    assert_allclose(model.calc_logp_posterior_predictive_all(U_model), actual)
+
+
+def test_unpickling_rebuilds_caches(fitted_model):
+    model, truth_dict = fitted_model
+    data = truth_dict['data']
+
+    # Mimic a model pickled before the cached attributes were introduced.
+    state = {key: value for key, value in model.__dict__.items()
+             if not key.startswith('_')}
+    old_model = plda.Model.__new__(plda.Model)
+    old_model.__dict__.update(state)
+
+    loaded = pickle.loads(pickle.dumps(old_model))
+
+    assert_allclose(loaded.score(data), model.score(data))
+    assert_allclose(loaded.transform(data, 'D', 'U_model'),
+                    model.transform(data, 'D', 'U_model'))
+
+
+def test_transform_D_to_U(fitted_model):
+    model, truth_dict = fitted_model
+    data = truth_dict['data']
+
+    X = model.transform(data, 'D', 'X')
+
+    expected = model.transform(X, 'X', 'U')
+    actual = model.transform(data, 'D', 'U')
+    assert_allclose(actual, expected)
+
+    expected = model.transform(X, 'X', 'U_model')
+    actual = model.transform(data, 'D', 'U_model')
+    assert_allclose(actual, expected)
+
+
+def test_apply_on_unique_rows():
+    np.random.seed(1234)
+
+    rows = np.random.random((5, 3))
+    data = rows[np.random.randint(0, 5, (4, 10))]
+
+    def func(x):
+        return np.stack([x.sum(axis=-1), x.prod(axis=-1)], axis=-1)
+
+    actual = apply_on_unique_rows(func, data)
+
+    assert actual.shape == (4, 10, 2)
+    assert_allclose(actual, func(data))
+
+
+def test_calc_logp_unique(fitted_model):
+    model, truth_dict = fitted_model
+    U_model = model.transform(truth_dict['data'][:20], 'D', 'U_model')
+    U_model = np.concatenate([U_model, U_model[::-1]])
+
+    assert_allclose(model.calc_logp_prior(U_model, unique=True),
+                    model.calc_logp_prior(U_model))
+    assert_allclose(model.calc_logp_posterior(U_model, 0, unique=True),
+                    model.calc_logp_posterior(U_model, 0))
+    assert_allclose(
+        model.calc_logp_posterior_predictive(U_model, 0, unique=True),
+        model.calc_logp_posterior_predictive(U_model, 0))
+    assert_allclose(
+        model.calc_logp_posterior_predictive_all(U_model, unique=True),
+        model.calc_logp_posterior_predictive_all(U_model))
+
+
+def test_transform_D_to_U_far_from_origin(fitted_model):
+    _, truth_dict = fitted_model
+    data = (truth_dict['data'] + 1e4).astype(np.float32)
+
+    model = plda.Model()
+    model.fit(data, truth_dict['labels'], dtype=np.float32)
+
+    pca = model.pca
+    X = np.matmul(data - pca.mean_.astype(np.float64), pca.components_.T)
+    U = np.matmul(X - model.m, model.inv_A.T)
+    expected = U[:, model.relevant_U_dims]
+
+    actual = model.transform(data, 'D', 'U_model')
+
+    assert_allclose(actual, expected, atol=1e-4)
+
+
+def test_calc_sufficient_statistics():
+    np.random.seed(1234)
+
+    data = np.random.random((3, 20, 5))
+    n, sum_U, sumsq_U = calc_sufficient_statistics(data)
+
+    assert n == 20
+    assert_allclose(sum_U, data.sum(axis=-2))
+    assert_allclose(sumsq_U, (data ** 2).sum(axis=-2))
+
+
+def test_calc_same_diff_log_likelihood_ratio(fitted_model):
+    model, truth_dict = fitted_model
+    U_model = model.transform(truth_dict['data'], 'D', 'U_model')
+    U_model_p = U_model[:7]
+    U_model_g = U_model[7:300]
+
+    U_model_same = np.concatenate([U_model_p, U_model_g])
+    expected = model.calc_logp_marginal_likelihood(U_model_same)
+    expected -= model.calc_logp_marginal_likelihood(U_model_p)
+    expected -= model.calc_logp_marginal_likelihood(U_model_g)
+
+    actual = model.calc_same_diff_log_likelihood_ratio(U_model_p, U_model_g)
+
+    assert_allclose(actual, expected)
+
+
+def test_enroll(fitted_model):
+    model, truth_dict = fitted_model
+    U_model = model.transform(truth_dict['data'], 'D', 'U_model')
+    U_model_p = U_model[:10]
+    U_model_g = U_model[10:50]
+
+    enrollment = model.enroll(U_model_g)
+    assert enrollment['n'] == 40
+
+    expected = model.calc_same_diff_log_likelihood_ratio(U_model_p, U_model_g)
+    actual = model.calc_same_diff_log_likelihood_ratio(U_model_p, enrollment)
+
+    assert_allclose(actual, expected)
+
+
 def test_get_space_walk():
     spaces = ['U_model', 'U', 'X', 'D']
 
     actual = list(get_space_walk('U_model', 'D'))
-    expected = list(zip(spaces[:-1], spaces[1:]))
+    expected = [(spaces[0], spaces[2]), (spaces[2], spaces[3])]
     assert actual == expected
 
     actual = list(get_space_walk('U_model', 'X'))
-    expected = list(zip(spaces[:-2], spaces[1:-1]))
+    expected = [(spaces[0], spaces[2])]
     assert actual == expected
 
     actual = list(get_space_walk('U_model', 'U'))
@@ -119,7 +410,7 @@ def test_transform_X_to_U():
     m = np.random.random(dim)
 
     data = np.matmul(expected, A.T) + m
-    actual = transform_X_to_U(data, np.linalg.inv(A), m)
+    actual = transform_X_to_U(data, np.linalg.inv(A).T, m)
 
     assert_allclose(actual, expected)
 
@@ -173,7 +464,25 @@ def test_transform_U_to_X():
     expected = np.random.random((n, dim))
 
     data = np.matmul(expected - m, np.linalg.inv(A).T)
-    actual = transform_U_to_X(data, A, m)
+    actual = transform_U_to_X(data, A.T, m)
+
+    assert_allclose(actual, expected)
+
+
+def test_transform_U_model_to_X():
+    np.random.seed(1234)
+
+    n = 100
+    dim = 5
+    A = gen_invertible_matrix(dim, 10)
+    m = np.random.random(dim)
+    relevant_U_dims = np.array([0, 2, 3])
+
+    data = np.random.random((n, relevant_U_dims.shape[0]))
+
+    U = transform_U_model_to_U(data, relevant_U_dims, dim)
+    expected = transform_U_to_X(U, A.T, m)
+    actual = transform_U_model_to_X(data, A[:, relevant_U_dims].T, m)
 
     assert_allclose(actual, expected)
 
@@ -19,12 +19,14 @@ from numpy.testing import assert_allclose
 from numpy.testing import assert_array_equal
 from plda.plda.optimizer import (
     calc_A,
+    calc_inv_A,
     calc_W,
     calc_Lambda_b,
     calc_Lambda_w,
     calc_m,
     calc_n_avg,
     calc_Psi,
+    calc_rank,
     calc_scatter_matrices,
     as_dictionary_of_dictionaries,
     get_prior_params,
@@ -142,6 +144,21 @@ def test_calc_A(expected_W):
     assert_allclose(actual, expected)
 
 
+def test_calc_inv_A(expected_W):
+    N = 1234
+    K = 23
+    n_avg = N / K
+
+    W = expected_W
+    dim = W.shape[0]
+    Lambda_w = np.diag(np.arange(1, dim + 1))
+
+    actual = calc_inv_A(n_avg, Lambda_w, W)
+    expected = np.linalg.inv(calc_A(n_avg, Lambda_w, W))
+
+    assert_allclose(actual, expected)
+
+
 def test_calc_Lambda_b(expected_scatter_matrices, expected_W,
                        expected_Lambda_b):
     S_b = expected_scatter_matrices['S_b']
@@ -219,6 +236,16 @@ def test_calc_Psi():
     assert_allclose(actual_Psi.diagonal(), expected_Psi.diagonal())
 
 
+def test_calc_rank(expected_scatter_matrices):
+    S_w = expected_scatter_matrices['S_w']
+    assert calc_rank(S_w) == np.linalg.matrix_rank(S_w)
+
+    np.random.seed(1234)
+    arr = np.random.random((10, 4))
+    S = np.matmul(arr, arr.T)
+    assert calc_rank(S) == np.linalg.matrix_rank(S) == 4
+
+
 def test_calc_scatter_matrices():
     X = np.asarray([[ 0,  1], [ 2,  3], [ 4,  5], [ 6,  7],
                     [ 8,  9], [10, 11], [12, 13], [14, 15]])
@@ -273,6 +300,32 @@ def test_get_posterior_params():
         assert_allclose(actual[key]['mean'], expected_mean)
 
 
+def test_get_posterior_params_unsorted_labels():
+    np.random.seed(1234)
+
+    dim = 5
+    prior_params = {'mean': np.zeros(dim),
+                    'cov_diag': np.random.random(dim)}
+
+    Y = np.random.choice(['a', 'b', 'c'], 30)
+    U_model = np.random.random((30, dim))
+
+    actual = get_posterior_params(U_model, Y, prior_params)
+
+    assert list(actual.keys()) == ['a', 'b', 'c']
+
+    for key in ['a', 'b', 'c']:
+        n_k = (Y == key).sum()
+
+        diag = prior_params['cov_diag']
+
+        expected_cov_diag = diag / (1 + n_k * diag)
+        assert_allclose(actual[key]['cov_diag'], expected_cov_diag)
+
+        expected_mean = U_model[Y == key].sum(axis=0) * expected_cov_diag
+        assert_allclose(actual[key]['mean'], expected_mean)
+
+
 def test_get_posterior_predictive_params():
     np.random.seed(1234)
     dim = 5